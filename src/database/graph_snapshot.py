@@ -0,0 +1,498 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+
+from neo4j import GraphDatabase
+from neo4j import spatial as neo4j_spatial
+from neo4j import time as neo4j_time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MAGIC = b"SWKGSNP1"
+VERSION = 2
+CHECKSUM_SIZE = 32  # sha256 no final do arquivo
+
+# Tipo da coluna -> typecode do array com os valores
+TYPECODES = {"bool": "b", "int": "q", "float": "d"}
+
+# Formato do arquivo:
+#   MAGIC | u32 tamanho do cabeçalho | cabeçalho JSON | seções alinhadas em 8 bytes | sha256
+# Cada tabela de nós (um conjunto de labels) guarda uma coluna por propriedade:
+# arrays tipados para números/booleanos, offsets + blob UTF-8 para textos e uma
+# máscara de presença quando há nulos. As arestas de cada (tipo, origem, destino)
+# são arrays u32 com as linhas dos nós nas tabelas, ordenados pela origem, mais
+# um array de offsets (CSR) por linha de origem, tudo mapeável direto do mmap.
+# Valores que não são primitivos (datas, durações, pontos, listas, colunas que
+# misturam inteiros e floats) vão para colunas JSON com marcação de tipo.
+
+TEMPORAL_TYPES = {
+    "date": neo4j_time.Date,
+    "time": neo4j_time.Time,
+    "datetime": neo4j_time.DateTime,
+}
+POINT_TYPES = {
+    7203: neo4j_spatial.CartesianPoint, 9157: neo4j_spatial.CartesianPoint,
+    4326: neo4j_spatial.WGS84Point, 4979: neo4j_spatial.WGS84Point,
+}
+
+
+def _encode_special(value: Any) -> Dict[str, Any]:
+    """Marca tipos do Neo4j que o JSON não representa; recusa os desconhecidos"""
+    for tag, cls in TEMPORAL_TYPES.items():
+        if isinstance(value, cls):
+            encoded = {"$t": tag, "v": value.iso_format()}
+            tzinfo = getattr(value, "tzinfo", None)
+            zone = getattr(tzinfo, "zone", None) or getattr(tzinfo, "key", None)
+            if zone:
+                encoded["zone"] = zone
+            return encoded
+    if isinstance(value, neo4j_time.Duration):
+        return {"$t": "duration", "months": value.months, "days": value.days,
+                "seconds": value.seconds, "nanoseconds": value.nanoseconds}
+    if isinstance(value, neo4j_spatial.Point):
+        return {"$t": "point", "srid": value.srid, "coords": list(value)}
+    raise TypeError(f"Tipo de propriedade não suportado no snapshot: {type(value).__name__} ({value!r})")
+
+
+def _tag_tuples(value: Any) -> Any:
+    # Pontos e durações são tuplas e o json.dumps os gravaria como listas sem chamar `default`
+    if isinstance(value, (neo4j_spatial.Point, neo4j_time.Duration)):
+        return _encode_special(value)
+    if isinstance(value, (list, tuple)):
+        return [_tag_tuples(item) for item in value]
+    return value
+
+
+def _decode_special(obj: Dict[str, Any]) -> Any:
+    tag = obj.get("$t")
+    if tag in TEMPORAL_TYPES:
+        value = TEMPORAL_TYPES[tag].from_iso_format(obj["v"])
+        if obj.get("zone"):
+            from zoneinfo import ZoneInfo
+            value = value.astimezone(ZoneInfo(obj["zone"]))
+        return value
+    if tag == "duration":
+        return neo4j_time.Duration(months=obj["months"], days=obj["days"],
+                                   seconds=obj["seconds"], nanoseconds=obj["nanoseconds"])
+    if tag == "point":
+        return POINT_TYPES.get(obj["srid"], neo4j_spatial.CartesianPoint)(obj["coords"])
+    return obj
+
+
+def _infer_type(values: List[Any]) -> str:
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present):
+        return "bool"
+    if present and all(isinstance(v, int) and not isinstance(v, bool) and -2 ** 63 <= v < 2 ** 63 for v in present):
+        return "int"
+    if present and all(isinstance(v, float) for v in present):
+        return "float"
+    if all(isinstance(v, str) for v in present):
+        return "str"
+    return "json"
+
+
+def _little_endian(values: array) -> array:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class _SnapshotWriter:
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def add(self, data: bytes) -> List[int]:
+        offset = self.size
+        self.chunks.append(data)
+        self.size += len(data)
+        padding = -self.size % 8
+        if padding:
+            self.chunks.append(b"\0" * padding)
+            self.size += padding
+        return [offset, len(data)]
+
+    def add_column(self, name: str, values: List[Any]) -> Dict[str, Any]:
+        kind = _infer_type(values)
+        column = {"name": name, "type": kind, "mask": None}
+        if any(v is None for v in values):
+            column["mask"] = self.add(bytes(v is not None for v in values))
+
+        if kind in TYPECODES:
+            zero = False if kind == "bool" else 0
+            data = array(TYPECODES[kind], [zero if v is None else v for v in values])
+            column["data"] = self.add(_little_endian(data).tobytes())
+        else:
+            if kind == "json":
+                values = [None if v is None else json.dumps(_tag_tuples(v), default=_encode_special) for v in values]
+            encoded = [b"" if v is None else v.encode("utf-8") for v in values]
+            offsets = array("Q", [0])
+            for item in encoded:
+                offsets.append(offsets[-1] + len(item))
+            column["offsets"] = self.add(_little_endian(offsets).tobytes())
+            column["data"] = self.add(b"".join(encoded))
+        return column
+
+
+def write_snapshot(path: str, tables: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                   schema: Optional[List[str]] = None):
+    """Grava o snapshot.
+
+    `tables` é uma lista de {"labels": [...], "rows": [dict de propriedades]};
+    `edges` é uma lista de {"type", "source", "target", "pairs": [(linha origem,
+    linha destino)], "props": [dict]} com `source`/`target` indexando `tables`;
+    `schema` são os comandos que recriam constraints e índices.
+    """
+    writer = _SnapshotWriter()
+    header = {"version": VERSION, "schema": schema or [], "nodes": [], "edges": []}
+
+    for table in tables:
+        rows = table["rows"]
+        names = sorted({key for row in rows for key in row})
+        header["nodes"].append({
+            "labels": table["labels"],
+            "count": len(rows),
+            "columns": [writer.add_column(name, [row.get(name) for row in rows]) for name in names]
+        })
+
+    for group in edges:
+        props = group.get("props") or [{} for _ in group["pairs"]]
+        order = sorted(range(len(group["pairs"])), key=lambda i: group["pairs"][i])
+        pairs = [group["pairs"][i] for i in order]
+        props = [props[i] for i in order]
+
+        offsets = array("I", [0] * (len(tables[group["source"]]["rows"]) + 1))
+        for src, _ in pairs:
+            offsets[src + 1] += 1
+        for row in range(1, len(offsets)):
+            offsets[row] += offsets[row - 1]
+
+        names = sorted({key for row in props for key in row})
+        header["edges"].append({
+            "type": group["type"],
+            "source": group["source"],
+            "target": group["target"],
+            "count": len(pairs),
+            "src": writer.add(_little_endian(array("I", [a for a, _ in pairs])).tobytes()),
+            "dst": writer.add(_little_endian(array("I", [b for _, b in pairs])).tobytes()),
+            "offsets": writer.add(_little_endian(offsets).tobytes()),
+            "columns": [writer.add_column(name, [row.get(name) for row in props]) for name in names]
+        })
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes
+    prefix += b"\0" * (-len(prefix) % 8)
+
+    digest = hashlib.sha256(prefix)
+    for chunk in writer.chunks:
+        digest.update(chunk)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(prefix)
+        for chunk in writer.chunks:
+            f.write(chunk)
+        f.write(digest.digest())
+
+
+class SnapshotColumn:
+    """Coluna de propriedades lida sob demanda a partir do mmap"""
+
+    def __init__(self, snapshot: "GraphSnapshot", spec: Dict[str, Any]):
+        self.name = spec["name"]
+        self.type = spec["type"]
+        self._mask = snapshot._view(spec["mask"]) if spec["mask"] else None
+        if self.type in TYPECODES:
+            self._values = snapshot._array(spec["data"], TYPECODES[self.type])
+        else:
+            self._offsets = snapshot._array(spec["offsets"], "Q")
+            self._data = snapshot._view(spec["data"])
+
+    def __getitem__(self, row: int) -> Any:
+        if self._mask is not None and not self._mask[row]:
+            return None
+        if self.type in TYPECODES:
+            value = self._values[row]
+            return bool(value) if self.type == "bool" else value
+        text = bytes(self._data[self._offsets[row]:self._offsets[row + 1]]).decode("utf-8")
+        return json.loads(text, object_hook=_decode_special) if self.type == "json" else text
+
+
+class GraphSnapshot:
+    """Grafo em memória restaurado de um snapshot, sem passar pelo Neo4j.
+
+    Os arrays ficam mapeados do arquivo; só as linhas consultadas são
+    decodificadas.
+    """
+
+    def __init__(self, path: str, verify: bool = True):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: List[memoryview] = []
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} não é um snapshot do grafo")
+        if verify and not self.verify():
+            self.close()
+            raise ValueError(f"Checksum inválido em {path}")
+
+        header_len = struct.unpack_from("<I", self._mmap, len(MAGIC))[0]
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._mmap[start:start + header_len].decode("utf-8"))
+        if self.header.get("version") != VERSION:
+            self.close()
+            raise ValueError(f"Versão de snapshot não suportada: {self.header.get('version')}")
+        self.schema = self.header["schema"]
+        self._data_start = start + header_len + (-(start + header_len) % 8)
+
+        self.tables = [
+            {"labels": spec["labels"], "count": spec["count"],
+             "columns": {c["name"]: SnapshotColumn(self, c) for c in spec["columns"]}}
+            for spec in self.header["nodes"]
+        ]
+        self.edges = [
+            {"type": spec["type"], "source": spec["source"], "target": spec["target"],
+             "count": spec["count"],
+             "src": self._array(spec["src"], "I"), "dst": self._array(spec["dst"], "I"),
+             "offsets": self._array(spec["offsets"], "I"),
+             "columns": {c["name"]: SnapshotColumn(self, c) for c in spec["columns"]}}
+            for spec in self.header["edges"]
+        ]
+
+        self._edges_by_source: Dict[int, List[Dict[str, Any]]] = {}
+        for group in self.edges:
+            self._edges_by_source.setdefault(group["source"], []).append(group)
+
+    def verify(self) -> bool:
+        """Confere o sha256 gravado no final do arquivo"""
+        body = memoryview(self._mmap)[:-CHECKSUM_SIZE]
+        try:
+            digest = hashlib.sha256(body).digest()
+        finally:
+            body.release()
+        return digest == self._mmap[-CHECKSUM_SIZE:]
+
+    def _view(self, section: List[int]) -> memoryview:
+        offset, length = section
+        start = self._data_start + offset
+        view = memoryview(self._mmap)[start:start + length]
+        self._views.append(view)
+        return view
+
+    def _array(self, section: List[int], typecode: str):
+        view = self._view(section)
+        if sys.byteorder == "big":
+            values = array(typecode, view.tobytes())
+            values.byteswap()
+            return values
+        cast = view.cast(typecode)
+        self._views.append(cast)
+        return cast
+
+    def node(self, table: int, row: int) -> Dict[str, Any]:
+        columns = self.tables[table]["columns"]
+        return {name: value for name, column in columns.items() if (value := column[row]) is not None}
+
+    def nodes(self, label: str) -> Iterator[Dict[str, Any]]:
+        for index, table in enumerate(self.tables):
+            if label in table["labels"]:
+                for row in range(table["count"]):
+                    yield self.node(index, row)
+
+    def find(self, label: str, prop: str, value: Any) -> List[Tuple[int, int]]:
+        """Retorna (tabela, linha) dos nós com o label e valor de propriedade dados"""
+        found = []
+        for index, table in enumerate(self.tables):
+            column = table["columns"].get(prop)
+            if label in table["labels"] and column is not None:
+                found.extend((index, row) for row in range(table["count"]) if column[row] == value)
+        return found
+
+    def neighbors(self, table: int, row: int, rel_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Nós alcançados pelas arestas de saída de um nó, via offsets CSR"""
+        result = []
+        for group in self._edges_by_source.get(table, []):
+            if rel_type and group["type"] != rel_type:
+                continue
+            offsets, dst = group["offsets"], group["dst"]
+            result.extend(self.node(group["target"], dst[i]) for i in range(offsets[row], offsets[row + 1]))
+        return result
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+        self._file.close()
+
+
+class StarWarsGraphSnapshot:
+    """Exporta o grafo do Neo4j para um snapshot e o restaura com escritas em lote"""
+
+    def __init__(self, batch_size: int = 5000):
+        self.batch_size = batch_size
+        self.driver = GraphDatabase.driver(
+            os.getenv("NEO4J_URI"),
+            auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+        )
+
+    def close(self):
+        self.driver.close()
+
+    def export(self, path: str):
+        """Lê todos os nós, propriedades e relacionamentos e grava o snapshot"""
+        tables: List[Dict[str, Any]] = []
+        table_index: Dict[Tuple[str, ...], int] = {}
+        locations: Dict[str, Tuple[int, int]] = {}
+        edge_groups: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+
+        with self.driver.session() as session:
+            schema = self._export_schema(session)
+
+            for record in session.run("MATCH (n) RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS props"):
+                labels = tuple(sorted(record["labels"]))
+                if labels not in table_index:
+                    table_index[labels] = len(tables)
+                    tables.append({"labels": list(labels), "rows": []})
+                table = table_index[labels]
+                locations[record["id"]] = (table, len(tables[table]["rows"]))
+                tables[table]["rows"].append(record["props"])
+
+            for record in session.run(
+                "MATCH (a)-[r]->(b) RETURN elementId(a) AS a, elementId(b) AS b, type(r) AS type, properties(r) AS props"
+            ):
+                source, src_row = locations[record["a"]]
+                target, dst_row = locations[record["b"]]
+                key = (record["type"], source, target)
+                group = edge_groups.setdefault(
+                    key, {"type": record["type"], "source": source, "target": target, "pairs": [], "props": []}
+                )
+                group["pairs"].append((src_row, dst_row))
+                group["props"].append(record["props"])
+
+        write_snapshot(path, tables, list(edge_groups.values()), schema)
+        print(f"Snapshot gravado em {path}: {len(locations)} nós, "
+              f"{sum(len(g['pairs']) for g in edge_groups.values())} relacionamentos")
+
+    def _export_schema(self, session) -> List[str]:
+        """Comandos de criação das constraints e dos índices que não pertencem a constraints"""
+        statements = [
+            record["createStatement"]
+            for record in session.run("SHOW CONSTRAINTS YIELD createStatement")
+        ]
+        statements.extend(
+            record["createStatement"]
+            for record in session.run(
+                "SHOW INDEXES YIELD type, owningConstraint, createStatement "
+                "WHERE owningConstraint IS NULL AND type <> 'LOOKUP' "
+                "RETURN createStatement"
+            )
+        )
+        return statements
+
+    def _restore_schema(self, session, statements: List[str]):
+        """Recria constraints e índices (inclusive os full-text) antes de inserir os dados"""
+        for statement in statements:
+            statement = re.sub(r"^(CREATE\s+.*?(?:CONSTRAINT|INDEX)\s+`[^`]+`)", r"\1 IF NOT EXISTS", statement, count=1)
+            try:
+                session.run(statement).consume()
+            except Exception as e:
+                print(f"Aviso: não foi possível recriar '{statement}': {str(e)}")
+
+    def restore(self, path: str, clear: bool = True):
+        """Recria o grafo no Neo4j a partir do snapshot usando UNWIND em lotes"""
+        snapshot = GraphSnapshot(path)
+        try:
+            with self.driver.session() as session:
+                if clear:
+                    session.run("MATCH (n) DETACH DELETE n")
+                self._restore_schema(session, snapshot.schema)
+
+                element_ids: List[List[Optional[str]]] = []
+                for index, table in enumerate(snapshot.tables):
+                    labels = "".join(f":`{label}`" for label in table["labels"])
+                    query = f"""
+                    UNWIND $rows AS row
+                    CREATE (n{labels})
+                    SET n = row.props
+                    RETURN row.i AS i, elementId(n) AS id
+                    """
+                    ids: List[Optional[str]] = [None] * table["count"]
+                    for start in range(0, table["count"], self.batch_size):
+                        rows = [
+                            {"i": row, "props": snapshot.node(index, row)}
+                            for row in range(start, min(start + self.batch_size, table["count"]))
+                        ]
+                        for record in session.execute_write(lambda tx: list(tx.run(query, rows=rows))):
+                            ids[record["i"]] = record["id"]
+                    element_ids.append(ids)
+
+                for group in snapshot.edges:
+                    query = f"""
+                    UNWIND $rels AS rel
+                    MATCH (a) WHERE elementId(a) = rel.a
+                    MATCH (b) WHERE elementId(b) = rel.b
+                    CREATE (a)-[r:`{group['type']}`]->(b)
+                    SET r = rel.props
+                    """
+                    src_ids, dst_ids = element_ids[group["source"]], element_ids[group["target"]]
+                    columns = group["columns"]
+                    for start in range(0, group["count"], self.batch_size):
+                        rels = [
+                            {"a": src_ids[group["src"][i]], "b": dst_ids[group["dst"][i]],
+                             "props": {name: column[i] for name, column in columns.items() if column[i] is not None}}
+                            for i in range(start, min(start + self.batch_size, group["count"]))
+                        ]
+                        session.execute_write(lambda tx: tx.run(query, rels=rels).consume())
+        finally:
+            snapshot.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot binário do grafo Star Wars")
+    parser.add_argument("command", choices=["export", "restore", "inspect"])
+    parser.add_argument("path", help="Arquivo do snapshot")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--no-clear", action="store_true", help="Não limpa o banco antes de restaurar")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "inspect":
+        snapshot = GraphSnapshot(args.path)
+        try:
+            for table in snapshot.tables:
+                print(f"{':'.join(table['labels'])}: {table['count']} nós, colunas {list(table['columns'])}")
+            for group in snapshot.edges:
+                source = ":".join(snapshot.tables[group["source"]]["labels"])
+                target = ":".join(snapshot.tables[group["target"]]["labels"])
+                print(f"({source})-[:{group['type']}]->({target}): {group['count']} relacionamentos")
+        finally:
+            snapshot.close()
+    else:
+        snapshotter = StarWarsGraphSnapshot(batch_size=args.batch_size)
+        try:
+            if args.command == "export":
+                snapshotter.export(args.path)
+            else:
+                snapshotter.restore(args.path, clear=not args.no_clear)
+                print(f"Snapshot {args.path} restaurado")
+        finally:
+            snapshotter.close()
+    print(f"Concluído em {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -42,6 +42,17 @@ class StarWarsGraphBuilder:
             for constraint in constraints:
                 session.run(constraint)
 
+    def create_fulltext_indexes(self):
+        """Cria índices full-text para busca aproximada de nomes e títulos"""
+        indexes = [
+            "CREATE FULLTEXT INDEX entity_names IF NOT EXISTS FOR (n:Character|Planet|Species|Starship|Vehicle|Weapon|Organization) ON EACH [n.name]",
+            "CREATE FULLTEXT INDEX movie_titles IF NOT EXISTS FOR (m:Movie) ON EACH [m.title]"
+        ]
+
+        with self.driver.session() as session:
+            for index in indexes:
+                session.run(index)
+
     def create_schema(self):
         """Define o esquema completo do grafo Star Wars"""
         schema_queries = [
@@ -200,7 +211,7 @@ class StarWarsGraphBuilder:
             for query in schema_queries:
                 session.run(query)
 
-    def build_graph(self):
+    def build_graph(self, fulltext_indexes: bool = True):
         """Executa todo o processo de construção do grafo"""
         print("Limpando banco de dados existente...")
         self.clear_database()
@@ -208,6 +219,10 @@ class StarWarsGraphBuilder:
         print("Criando constraints e índices...")
         self.create_constraints_and_indexes()
         
+        if fulltext_indexes:
+            print("Criando índices full-text...")
+            self.create_fulltext_indexes()
+        
         print("Definindo esquema do grafo...")
         self.create_schema()
         
@@ -1,3 +1,12 @@
-from .chain import StarWarsQAChain
+__all__ = ['StarWarsQAChain', 'EntityIndex']
 
-__all__ = ['StarWarsQAChain']
\ No newline at end of file
+
+def __getattr__(name):
+    # Importação preguiçosa: `import llm` não carrega LangChain nem o cliente Neo4j
+    if name == 'StarWarsQAChain':
+        from .chain import StarWarsQAChain
+        return StarWarsQAChain
+    if name == 'EntityIndex':
+        from .entity_resolver import EntityIndex
+        return EntityIndex
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,87 @@
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+PLACEHOLDER = re.compile(r"\{([^{}]+)\}")
+OUTPUT_PATTERN = re.compile(r"CYPHER:\s*(?P<cypher>.*?)\s*RESPOSTA:\s*(?P<template>.*)", re.DOTALL | re.IGNORECASE)
+# A tag de linguagem só é removida quando fecha a linha ("```cypher\n"), para não comer o MATCH de "```MATCH"
+CODE_FENCE = re.compile(r"```(?:[a-zA-Z]*[ \t]*\n)?")
+QUOTES = "\"'`“”"
+
+# Um modelo só vale para várias linhas se for um item de lista ("{name} ({planet})"),
+# não uma frase inteira que seria repetida a cada linha
+MAX_LIST_ITEM_WORDS = 3
+SENTENCE_PUNCTUATION = re.compile(r"[.!?]")
+
+
+def _clean(text: str) -> str:
+    """Remove cercas de código e aspas que envolvem o texto inteiro"""
+    text = CODE_FENCE.sub("", text).strip()
+    if len(text) >= 2 and text[0] in QUOTES and text[-1] in QUOTES:
+        text = text[1:-1].strip()
+    return text
+
+
+def parse_single_call_output(output: str) -> Tuple[str, Optional[str]]:
+    """Separa a consulta Cypher e o modelo de resposta gerados em uma única chamada.
+
+    Do modelo só vale a primeira linha não vazia após `RESPOSTA:`; cercas de
+    código, aspas e qualquer texto extra do LLM são descartados.
+    """
+    match = OUTPUT_PATTERN.search(output)
+    if not match:
+        cypher = re.sub(r"^\s*CYPHER:\s*", "", output, flags=re.IGNORECASE)
+        return _clean(cypher), None
+
+    cypher = _clean(match.group("cypher"))
+    template = None
+    for line in match.group("template").splitlines():
+        line = _clean(line)
+        if line:
+            template = line
+            break
+    return cypher, template
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_format_value(item) for item in value)
+    return str(value)
+
+
+def _fits(value: Any) -> bool:
+    """Nós, mapas, nulos e listas vazias não cabem no modelo e ficam para o LLM"""
+    if value is None or isinstance(value, dict):
+        return False
+    if isinstance(value, (list, tuple)):
+        return bool(value) and all(_fits(item) for item in value)
+    return True
+
+
+def render_answer_template(template: Optional[str], rows: List[Dict[str, Any]]) -> Optional[str]:
+    """Preenche o modelo com as linhas do resultado.
+
+    Retorna None quando o formato do resultado não cabe no modelo (sem linhas,
+    marcadores ausentes nas colunas, valores nulos, nós/mapas, ou uma frase
+    completa que seria repetida para várias linhas); nesse caso a resposta
+    deve ser gerada pelo LLM a partir dos dados.
+    """
+    if not template or not rows:
+        return None
+
+    fields = set(PLACEHOLDER.findall(template))
+    if not fields:
+        return None
+
+    if len(rows) > 1:
+        literal = PLACEHOLDER.sub(" ", template)
+        if SENTENCE_PUNCTUATION.search(literal) or len(re.findall(r"\w+", literal)) > MAX_LIST_ITEM_WORDS:
+            return None
+
+    rendered = []
+    for row in rows:
+        if not all(_fits(row.get(field)) for field in fields):
+            return None
+        rendered.append(PLACEHOLDER.sub(lambda m: _format_value(row[m.group(1)]), template))
+    return "\n".join(rendered)
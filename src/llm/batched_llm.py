@@ -0,0 +1,26 @@
+from typing import Any, List, Optional
+
+from langchain_core.language_models.llms import LLM
+
+from .batching import MicroBatcher
+
+
+class BatchedLLM(LLM):
+    """LLM do LangChain que envia cada prompt pelo `MicroBatcher`.
+
+    Fica no lugar de `self.llm`, de modo que tanto a implementação manual
+    quanto o `GraphCypherQAChain` passam pelo mesmo escalonamento.
+    """
+
+    batcher: MicroBatcher
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "ollama-micro-batched"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        if stop is not None:
+            kwargs["stop"] = stop
+        return self.batcher.invoke(prompt, **kwargs)
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+
+class MicroBatcher:
+    """Escalona os prompts concorrentes sobre os slots paralelos do Ollama.
+
+    No máximo `max_batch_size` requisições ficam em andamento (os slots do
+    servidor, OLLAMA_NUM_PARALLEL). Enquanto há slot livre o prompt sai na
+    hora; só quando todos estão ocupados ele espera na fila, e cada chamada
+    que termina já despacha os prompts pendentes que couberem nos slots
+    liberados. Não há janela de espera: agrupar prompts sem enviar uma
+    requisição conjunta só somaria latência. `llm.batch` não serve aqui
+    porque o `BaseLLM` gera os prompts de um lote em sequência. Cada resposta
+    volta ao seu chamador pela Future.
+    """
+
+    def __init__(self, llm, max_batch_size: Optional[int] = None):
+        self.llm = llm
+        self.max_batch_size = max_batch_size or int(
+            os.getenv("OLLAMA_MAX_BATCH", os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+        )
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_batch_size, thread_name_prefix="ollama-batch")
+        self._pending: deque = deque()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stats = {
+            "batches": 0,
+            "requests": 0,
+            "max_batch_size": 0,
+            "total_queue_delay": 0.0,
+            "max_queue_delay": 0.0,
+        }
+        self._closed = False
+
+    def invoke(self, prompt: str, timeout: Optional[float] = None, **kwargs) -> str:
+        """Envia o prompt assim que houver slot livre e aguarda a resposta"""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher encerrado")
+            self._pending.append((prompt, kwargs, future, time.perf_counter()))
+            self._dispatch()
+        return future.result(timeout=timeout)
+
+    def _dispatch(self):
+        """Ocupa os slots livres com os prompts pendentes; chamado com o lock adquirido"""
+        batch: List[Any] = []
+        while self._pending and self._in_flight < self.max_batch_size:
+            batch.append(self._pending.popleft())
+            self._in_flight += 1
+        if not batch:
+            return
+
+        dispatched_at = time.perf_counter()
+        delays = [dispatched_at - enqueued_at for _, _, _, enqueued_at in batch]
+        self._stats["batches"] += 1
+        self._stats["requests"] += len(batch)
+        self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+        self._stats["total_queue_delay"] += sum(delays)
+        self._stats["max_queue_delay"] = max(self._stats["max_queue_delay"], max(delays))
+
+        for prompt, kwargs, future, _ in batch:
+            call = self._executor.submit(self.llm.invoke, prompt, **kwargs)
+            call.add_done_callback(lambda call, future=future: self._route(call, future))
+
+    def _route(self, call: Future, future: Future):
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+            if not self._in_flight and not self._pending:
+                self._idle.notify_all()
+
+        error = call.exception()
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(call.result())
+
+    def metrics(self) -> Dict[str, Any]:
+        """Prompts despachados juntos (média/máximo) e atraso de fila em milissegundos"""
+        with self._lock:
+            stats = dict(self._stats)
+        requests = stats["requests"]
+        return {
+            "batches": stats["batches"],
+            "requests": requests,
+            "avg_batch_size": requests / stats["batches"] if stats["batches"] else 0.0,
+            "max_batch_size": stats["max_batch_size"],
+            "avg_queue_delay_ms": 1000 * stats["total_queue_delay"] / requests if requests else 0.0,
+            "max_queue_delay_ms": 1000 * stats["max_queue_delay"],
+        }
+
+    def close(self):
+        """Recusa novos prompts, espera os pendentes terminarem e libera as threads"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            while self._in_flight or self._pending:
+                self._idle.wait()
+        self._executor.shutdown()
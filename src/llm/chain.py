@@ -1,13 +1,46 @@
-from langchain_neo4j import Neo4jGraph
-from langchain_ollama import OllamaLLM
-from dotenv import load_dotenv
+import importlib
 import os
 
-load_dotenv()
+from .answer_template import parse_single_call_output, render_answer_template
+from .batching import MicroBatcher
+from .entity_resolver import EntityIndex
+
+# Implementações do GraphCypherQAChain, na ordem de preferência
+CHAIN_CANDIDATES = [
+    ("langchain.chains", "GraphCypherQAChain"),
+    ("langchain_community.chains.graph_qa.cypher", "GraphCypherQAChain"),
+]
+
+# Implementação escolhida na primeira inicialização: (módulo, classe) ou "manual"
+_resolved_chain = None
+
+
+def load_dependencies():
+    """Importa as dependências pesadas só quando a cadeia é criada"""
+    from dotenv import load_dotenv
+    from langchain_neo4j import Neo4jGraph
+    from langchain_ollama import OllamaLLM
+    from .batched_llm import BatchedLLM
+    from .ollama_client import OllamaSession
+
+    load_dotenv()
+    return Neo4jGraph, OllamaLLM, OllamaSession, BatchedLLM
+
+
+def cypher_string(value):
+    """Literal de string Cypher com aspas e barras escapadas ("Twi'lek" -> 'Twi\\'lek')"""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
 
 class StarWarsQAChain:
-    def __init__(self):
+    def __init__(self, single_call=None):
         """Inicialização com compatibilidade para diferentes versões do LangChain"""
+        Neo4jGraph, OllamaLLM, OllamaSession, BatchedLLM = load_dependencies()
+        
+        if single_call is None:
+            single_call = os.getenv("QA_SINGLE_CALL", "false").lower() in ("1", "true", "yes")
+        self.single_call = single_call
+        
         try:
             self.graph = Neo4jGraph(
                 url=os.getenv("NEO4J_URI"),
@@ -16,16 +49,26 @@ class StarWarsQAChain:
                 sanitize=True
             )
             
-            self.llm = OllamaLLM(
-                model=os.getenv("OLLAMA_MODEL"),
-                base_url=os.getenv("OLLAMA_BASE_URL"),
+            self.ollama = OllamaSession()
+            self.batcher = MicroBatcher(OllamaLLM(
+                model=self.ollama.model,
                 temperature=0.3,
                 top_k=40,
-                top_p=0.9
-            )
+                top_p=0.9,
+                **self.ollama.llm_kwargs()
+            ))
+            # Todas as chamadas, inclusive as do GraphCypherQAChain, passam pelo batcher
+            self.llm = BatchedLLM(batcher=self.batcher)
+            self._warm_up()
+            
+            self.entity_index = self._build_entity_index()
             
             self.chain = None
-            self._setup_chain()
+            if self.single_call:
+                self._create_manual_chain()
+                print("✅ Usando modo de chamada única (Cypher + modelo de resposta)")
+            else:
+                self._setup_chain()
             
             print("✅ Inicialização concluída com sucesso!")
             
@@ -33,50 +76,48 @@ class StarWarsQAChain:
             raise RuntimeError(f"Falha na inicialização: {str(e)}")
     
     def _setup_chain(self):
-        """Configura a cadeia de QA tentando diferentes importações"""
-        try:
-            from langchain.chains import GraphCypherQAChain
-            self.chain = GraphCypherQAChain.from_llm(
-                llm=self.llm,
-                graph=self.graph,
-                verbose=True,
-                validate_cypher=True,
-                return_intermediate_steps=True,
-                top_k=10
-            )
-            print("✅ Usando langchain.chains.GraphCypherQAChain")
-            return
-        except Exception as e:
-            print(f"⚠️ Tentativa 1 falhou: {str(e)}")
+        """Configura a cadeia de QA, tentando as importações só na primeira vez"""
+        global _resolved_chain
         
-        try:
-            from langchain_community.chains.graph_qa.cypher import GraphCypherQAChain
-            self.chain = GraphCypherQAChain.from_llm(
-                llm=self.llm,
-                graph=self.graph,
-                verbose=True,
-                validate_cypher=True,
-                return_intermediate_steps=True,
-                top_k=10
-            )
-            print("✅ Usando langchain_community.chains.graph_qa.cypher.GraphCypherQAChain")
+        if _resolved_chain is None:
+            for attempt, candidate in enumerate(CHAIN_CANDIDATES, start=1):
+                try:
+                    self._create_graph_chain(candidate)
+                    _resolved_chain = candidate
+                    print(f"✅ Usando {candidate[0]}.{candidate[1]}")
+                    return
+                except Exception as e:
+                    print(f"⚠️ Tentativa {attempt} falhou: {str(e)}")
+            _resolved_chain = "manual"
+        elif _resolved_chain != "manual":
+            self._create_graph_chain(_resolved_chain)
             return
-        except Exception as e:
-            print(f"⚠️ Tentativa 2 falhou: {str(e)}")
         
-        # Tentativa 3: Implementação manual básica
+        # Implementação manual básica
         try:
             self._create_manual_chain()
             print("✅ Usando implementação manual")
             return
         except Exception as e:
-            print(f"⚠️ Tentativa 3 falhou: {str(e)}")
+            print(f"⚠️ Implementação manual falhou: {str(e)}")
             
         raise RuntimeError("Não foi possível configurar a cadeia de QA")
     
+    def _create_graph_chain(self, candidate):
+        module_name, class_name = candidate
+        GraphCypherQAChain = getattr(importlib.import_module(module_name), class_name)
+        self.chain = GraphCypherQAChain.from_llm(
+            llm=self.llm,
+            graph=self.graph,
+            verbose=True,
+            validate_cypher=True,
+            return_intermediate_steps=True,
+            top_k=10
+        )
+    
     def _create_manual_chain(self):
         """Implementação manual robusta para geração de Cypher"""
-        from langchain.prompts import PromptTemplate
+        from langchain_core.prompts import PromptTemplate
         
         # Template melhorado para Cypher
         cypher_template = """Você é um especialista em Neo4j Cypher. 
@@ -104,6 +145,77 @@ class StarWarsQAChain:
             template=answer_template,
             input_variables=["question", "results"]
         )
+        
+        # Template para gerar Cypher e modelo de resposta em uma única chamada
+        single_call_template = """Você é um especialista em Neo4j Cypher.
+        Para a pergunta abaixo, gere a consulta Cypher e um modelo de resposta.
+        Nós: Character, Planet, Movie, Species, Starship, Vehicle (propriedade name; Movie usa title)
+        Relacionamentos: (:Character)-[:APPEARS_IN]->(:Movie), (:Character)-[:FROM_PLANET]->(:Planet), (:Character)-[:BELONGS_TO]->(:Species)
+        Dê um alias com AS a cada coluna retornada e use esses aliases entre chaves no modelo.
+        O modelo é aplicado a cada linha do resultado.
+        Responda EXATAMENTE neste formato, sem texto adicional:
+        CYPHER: <consulta>
+        RESPOSTA: <modelo>
+        
+        Exemplo para "De onde é Luke Skywalker?":
+        CYPHER: MATCH (c:Character {{name: 'Luke Skywalker'}})-[:FROM_PLANET]->(p:Planet) RETURN c.name AS name, p.name AS planet
+        RESPOSTA: {{name}} é do planeta {{planet}}.
+        
+        Pergunta: {question}"""
+        
+        self.single_call_prompt = PromptTemplate(
+            template=single_call_template,
+            input_variables=["question"]
+        )
+    
+    def _warm_up(self):
+        """Carrega o modelo no Ollama antes da primeira pergunta"""
+        try:
+            elapsed = self.ollama.warm_up()
+            print(f"✅ Modelo {self.ollama.model} aquecido em {elapsed:.2f}s (keep_alive={self.ollama.keep_alive})")
+        except Exception as e:
+            print(f"⚠️ Aquecimento do modelo falhou: {str(e)}")
+    
+    def _build_entity_index(self):
+        """Carrega os nomes do grafo no índice de resolução de entidades"""
+        try:
+            index = EntityIndex.from_graph(self.graph)
+            print(f"✅ Índice de entidades carregado - {len(index)} entidades")
+            return index
+        except Exception as e:
+            print(f"⚠️ Índice de entidades indisponível: {str(e)}")
+            return None
+    
+    def _ground_question(self, question):
+        """Anexa à pergunta os nomes canônicos das entidades mencionadas"""
+        if not self.entity_index:
+            return question
+        
+        mentions = self.entity_index.resolve_question(question)
+        if not mentions:
+            return question
+        
+        exact, partial = [], []
+        for mention in mentions:
+            # Havendo acerto exato, as sugestões parciais da mesma menção são descartadas
+            matches = [match for match in mention["matches"] if not match["partial"]] or mention["matches"]
+            options = " ou ".join(
+                f"(:{match['label']} {{{match['property']}: {cypher_string(match['name'])}}})"
+                for match in matches[:3]
+            )
+            hint = f"- \"{mention['mention']}\" -> {options}"
+            if matches[0]["partial"]:
+                partial.append(hint)
+            else:
+                exact.append(hint)
+        
+        print(f"🎯 Entidades resolvidas: {len(mentions)}")
+        sections = [question]
+        if exact:
+            sections.append("Entidades identificadas no grafo (use exatamente estes nomes):\n" + "\n".join(exact))
+        if partial:
+            sections.append("Possíveis entidades (sugestões; use apenas se fizerem sentido na pergunta):\n" + "\n".join(partial))
+        return "\n".join(sections)
     
     def test_connections(self):
         try:
@@ -112,8 +224,10 @@ class StarWarsQAChain:
             )
             print(f"✅ Neo4j conectado - Nós: {result[0]['node_count']}")
             
-            test_response = self.llm.invoke("Teste")
-            print(f"✅ Ollama conectado - Resposta: {test_response[:50]}...")
+            status = self.ollama.ping()
+            if not status["model_available"]:
+                raise RuntimeError(f"Modelo {self.ollama.model} não encontrado no Ollama")
+            print(f"✅ Ollama conectado - Modelo: {self.ollama.model}")
             
             return True
         except Exception as e:
@@ -125,10 +239,14 @@ class StarWarsQAChain:
         try:
             print(f"🔍 Processando pergunta: {question}")
             
-            if hasattr(self, 'chain') and self.chain:
-                return self._query_with_chain(question)
+            grounded_question = self._ground_question(question)
+            
+            if self.single_call:
+                return self._query_single_call(question, grounded_question)
+            elif hasattr(self, 'chain') and self.chain:
+                return self._query_with_chain(grounded_question)
             else:
-                return self._query_manual(question)
+                return self._query_manual(question, grounded_question)
                 
         except Exception as e:
             return {"error": f"Erro na consulta: {str(e)}"}
@@ -142,12 +260,12 @@ class StarWarsQAChain:
             "context": result.get("context", [])
         }
     
-    def _query_manual(self, question):
+    def _query_manual(self, question, grounded_question=None):
         """Executa consulta usando implementação manual melhorada"""
         try:
             # Gera consulta Cypher
             cypher_query = self.llm.invoke(
-                self.cypher_prompt.format(question=question)
+                self.cypher_prompt.format(question=grounded_question or question)
             ).strip()
             
             print(f"Generated Cypher: {cypher_query}")  # Debug
@@ -172,6 +290,43 @@ class StarWarsQAChain:
         except Exception as e:
             return {"error": f"Erro: {str(e)}"}
 
+    def _query_single_call(self, question, grounded_question=None):
+        """Gera Cypher e modelo de resposta juntos; o LLM só é chamado de novo se o modelo não servir"""
+        try:
+            output = self.llm.invoke(
+                self.single_call_prompt.format(question=grounded_question or question)
+            )
+            cypher_query, template = parse_single_call_output(output)
+            
+            print(f"Generated Cypher: {cypher_query}")  # Debug
+            
+            results = self.graph.query(cypher_query)
+            
+            answer = render_answer_template(template, results)
+            llm_calls = 1
+            if answer is None:
+                answer = self.llm.invoke(
+                    self.answer_prompt.format(
+                        question=question,
+                        results=str(results)
+                    )
+                )
+                llm_calls = 2
+            
+            return {
+                "answer": answer,
+                "cypher_query": cypher_query,
+                "context": results,
+                "llm_calls": llm_calls
+            }
+            
+        except Exception as e:
+            return {"error": f"Erro: {str(e)}"}
+
+    def close(self):
+        self.batcher.close()
+        self.ollama.close()
+
     def get_schema(self):
         """Método para visualizar o esquema do banco"""
         try:
@@ -0,0 +1,264 @@
+import math
+import re
+import unicodedata
+from typing import Dict, List, Any, Optional, Set
+
+# Apelidos comuns digitados pelos usuários -> nome canônico no grafo
+DEFAULT_ALIASES = {
+    "chewie": "Chewbacca",
+    "artoo": "R2-D2",
+    "artoo detoo": "R2-D2",
+    "threepio": "C-3PO",
+    "see threepio": "C-3PO",
+    "ben kenobi": "Obi-Wan Kenobi",
+    "obi wan": "Obi-Wan Kenobi",
+    "vader": "Darth Vader",
+    "sidious": "Palpatine",
+    "darth sidious": "Palpatine",
+    "imperador": "Palpatine",
+    "emperor": "Palpatine",
+    "jabba": "Jabba Desilijic Tiure",
+    "jabba the hutt": "Jabba Desilijic Tiure",
+    "leia": "Leia Organa",
+    "princesa leia": "Leia Organa",
+    "princess leia": "Leia Organa",
+    "conde dooku": "Dooku",
+    "count dooku": "Dooku",
+    "general grievous": "Grievous",
+    "almirante ackbar": "Ackbar",
+    "admiral ackbar": "Ackbar",
+    "millennium falcon": "Millennium Falcon",
+    "falcon": "Millennium Falcon",
+    "estrela da morte": "Death Star",
+}
+
+ROMAN_NUMERALS = {
+    1: "i", 2: "ii", 3: "iii", 4: "iv", 5: "v",
+    6: "vi", 7: "vii", 8: "viii", 9: "ix",
+}
+
+EPISODE_PREFIXES = ["episodio", "episode", "ep", "filme", "film", "star wars"]
+
+# Palavras que nunca devem ser tratadas como menção a uma entidade
+STOPWORDS = {
+    "a", "o", "as", "os", "de", "do", "da", "dos", "das", "e", "em", "no", "na",
+    "nos", "nas", "um", "uma", "que", "quem", "qual", "quais", "quantos",
+    "quantas", "onde", "como", "por", "para", "com", "sao", "foi", "eram",
+    "era", "tem", "ao", "aos", "se", "seu", "sua", "filme", "filmes",
+    "personagem", "personagens", "planeta", "planetas", "especie", "especies",
+    "nave", "naves", "veiculo", "veiculos", "episodio", "episodios",
+    "the", "of", "in", "on", "and", "who", "what", "which", "where", "how",
+    "is", "are", "was", "were", "from", "star", "wars", "appears", "aparece",
+    "aparecem", "nasceu", "pilota", "pilotam", "character", "characters",
+    "planet", "movie", "movies", "episode", "species", "ship", "starship",
+    # Propriedades do esquema: perguntas sobre atributos, não sobre entidades
+    "massa", "peso", "altura", "cor", "cores", "olhos", "olho", "cabelo",
+    "pele", "genero", "nascimento", "ano", "clima", "terreno", "populacao",
+    "diametro", "gravidade", "rotacao", "orbita", "agua", "modelo",
+    "fabricante", "custo", "preco", "comprimento", "velocidade", "tripulacao",
+    "passageiros", "carga", "hiperpropulsor", "classificacao", "designacao",
+    "idioma", "lingua", "expectativa", "vida", "diretor", "produtor",
+    "lancamento", "data", "mass", "weight", "height", "color", "eye", "eyes",
+    "hair", "skin", "gender", "birth", "year", "climate", "terrain",
+    "population", "diameter", "gravity", "model", "manufacturer", "cost",
+    "length", "speed", "crew", "passengers", "cargo", "language", "director",
+    "producer", "release",
+}
+
+# Peso de um token isolado de um nome composto ("Skywalker", "Lars"): é só uma
+# sugestão, nunca um acerto exato
+PARTIAL_SCORE = 0.8
+
+MAX_MENTION_WORDS = 4
+
+
+def normalize(text: str) -> str:
+    """Remove acentos, pontuação e caixa para comparação de nomes"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Gera os trigramas de um texto normalizado, com preenchimento nas bordas"""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EntityIndex:
+    """Índice em memória dos nomes do grafo para resolver menções nas perguntas.
+
+    Cada entidade é registrada sob várias chaves normalizadas (nome completo,
+    nome sem espaços, tokens do nome, apelidos e números de episódio). A busca
+    tenta primeiro um acerto exato em dicionário e só então recorre à
+    similaridade de trigramas, cujo índice invertido mantém a consulta abaixo
+    de um milissegundo mesmo com dezenas de milhares de entidades.
+    """
+
+    def __init__(self, min_score: float = 0.5):
+        self.min_score = min_score
+        self.entities: List[Dict[str, Any]] = []
+        self._by_name: Dict[str, List[int]] = {}
+        self._seen: Set[tuple] = set()
+        self._keys: Dict[str, Dict[int, float]] = {}
+        self._key_list: List[str] = []
+        self._key_ids: Dict[str, int] = {}
+        self._key_grams: List[Set[str]] = []
+        self._key_weights: List[float] = []
+        self._postings: Dict[str, List[int]] = {}
+
+    def __len__(self):
+        return len(self.entities)
+
+    @classmethod
+    def from_graph(cls, graph, aliases: Optional[Dict[str, str]] = None, **kwargs) -> "EntityIndex":
+        """Constrói o índice a partir de todos os nós com `name` ou `title`"""
+        index = cls(**kwargs)
+        rows = graph.query(
+            """
+            MATCH (n)
+            WHERE n.name IS NOT NULL OR n.title IS NOT NULL
+            RETURN labels(n)[0] AS label,
+                   coalesce(n.name, n.title) AS name,
+                   CASE WHEN n.name IS NULL THEN 'title' ELSE 'name' END AS property,
+                   n.episode_id AS episode_id
+            """
+        )
+        for row in rows:
+            index.add(row["name"], row["label"], row["property"])
+            if row.get("episode_id") is not None:
+                index.add_episode(row["name"], row["episode_id"])
+
+        for alias, name in (DEFAULT_ALIASES if aliases is None else aliases).items():
+            index.add_alias(alias, name)
+        return index
+
+    def add(self, name: str, label: str, prop: str = "name"):
+        """Registra uma entidade com seu nome completo, forma compacta e tokens"""
+        if not name or (label, name) in self._seen:
+            return
+        entity_id = len(self.entities)
+        self.entities.append({"name": name, "label": label, "property": prop})
+        self._seen.add((label, name))
+        self._by_name.setdefault(name, []).append(entity_id)
+
+        key = normalize(name)
+        self._add_key(key, entity_id)
+        if " " in key:
+            self._add_key(key.replace(" ", ""), entity_id)
+            for token in key.split():
+                if len(token) >= 3 and token not in STOPWORDS:
+                    self._add_key(token, entity_id, PARTIAL_SCORE)
+
+    def add_alias(self, alias: str, name: str):
+        """Associa um apelido às entidades já registradas com esse nome"""
+        for entity_id in self._by_name.get(name, []):
+            self._add_key(normalize(alias), entity_id)
+
+    def add_episode(self, title: str, episode_id: int):
+        """Mapeia 'Episódio 4', 'Episode IV', 'ep 4'... para o título do filme"""
+        numbers = [str(episode_id)]
+        if episode_id in ROMAN_NUMERALS:
+            numbers.append(ROMAN_NUMERALS[episode_id])
+        for entity_id in self._by_name.get(title, []):
+            for prefix in EPISODE_PREFIXES:
+                for number in numbers:
+                    self._keys.setdefault(f"{prefix} {number}", {})[entity_id] = 1.0
+
+    def _add_key(self, key: str, entity_id: int, score: float = 1.0):
+        if not key:
+            return
+        if key not in self._keys:
+            self._keys[key] = {}
+            key_id = len(self._key_list)
+            self._key_list.append(key)
+            self._key_ids[key] = key_id
+            grams = trigrams(key)
+            self._key_grams.append(grams)
+            self._key_weights.append(0.0)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(key_id)
+        entities = self._keys[key]
+        entities[entity_id] = max(score, entities.get(entity_id, 0.0))
+        key_id = self._key_ids[key]
+        self._key_weights[key_id] = max(self._key_weights[key_id], score)
+
+    def resolve(self, mention: str, fuzzy: bool = True) -> List[Dict[str, Any]]:
+        """Resolve uma menção para as entidades candidatas, da melhor para a pior.
+
+        Nomes completos, apelidos e episódios pontuam 1.0; tokens isolados de
+        nomes compostos e erros de digitação ficam abaixo disso (`partial`).
+        """
+        key = normalize(mention)
+        if not key:
+            return []
+
+        if key in self._keys:
+            return self._matches(self._keys[key], 1.0)
+        if not fuzzy:
+            return []
+
+        # Filtro de prefixo: uma chave com Dice >= min_score precisa compartilhar
+        # pelo menos `need` trigramas, logo aparece em alguma das
+        # len(grams) - need + 1 listas mais raras; as demais nem são percorridas.
+        grams = trigrams(key)
+        threshold = self.min_score
+        min_size = len(grams) * threshold / (2 - threshold)
+        need = max(1, math.ceil(threshold * (len(grams) + min_size) / 2))
+        rarest = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+        candidates: Set[int] = set()
+        for gram in rarest[:len(grams) - need + 1]:
+            candidates.update(self._postings.get(gram, ()))
+
+        # Coeficiente de Dice entre os conjuntos de trigramas, já ponderado pelo
+        # peso da chave: um token parcial precisa de uma similaridade maior
+        best_id, best_score, best_dice = -1, 0.0, 0.0
+        for key_id in candidates:
+            key_grams = self._key_grams[key_id]
+            dice = 2.0 * len(grams & key_grams) / (len(grams) + len(key_grams))
+            score = dice * self._key_weights[key_id]
+            if score > best_score:
+                best_id, best_score, best_dice = key_id, score, dice
+        if best_score < self.min_score:
+            return []
+        return self._matches(self._keys[self._key_list[best_id]], best_dice)
+
+    def _matches(self, entities: Dict[int, float], score: float) -> List[Dict[str, Any]]:
+        """Candidatas da chave acima de `min_score`; `partial` marca as que não são acerto exato do nome"""
+        matches = []
+        for entity_id, weight in entities.items():
+            match_score = round(score * weight, 3)
+            if match_score < self.min_score:
+                continue
+            matches.append(dict(self.entities[entity_id], score=match_score, partial=match_score < 1.0))
+        return sorted(matches, key=lambda match: (-match["score"], match["name"], match["label"]))
+
+    def resolve_question(self, question: str) -> List[Dict[str, Any]]:
+        """Encontra as menções a entidades em uma pergunta.
+
+        Percorre as janelas de palavras da maior para a menor, aceitando
+        primeiro acertos exatos; palavras isoladas que sobrarem passam pela
+        busca aproximada (erros de digitação).
+        """
+        words = normalize(question).split()
+        used = [False] * len(words)
+        found = []
+
+        for size in range(min(MAX_MENTION_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                span = range(start, start + size)
+                if any(used[i] for i in span):
+                    continue
+                mention = " ".join(words[start:start + size])
+                if size == 1 and (mention in STOPWORDS or len(mention) < 3):
+                    continue
+                matches = self.resolve(mention, fuzzy=size == 1 and len(mention) >= 4)
+                if matches:
+                    for i in span:
+                        used[i] = True
+                    found.append({"start": start, "mention": mention, "matches": matches})
+
+        found.sort(key=lambda item: item["start"])
+        for item in found:
+            del item["start"]
+        return found
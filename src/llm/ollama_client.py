@@ -0,0 +1,109 @@
+import os
+import time
+from typing import Dict, Any, Optional
+
+import httpx
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RetryTransport(httpx.BaseTransport):
+    """Transporte httpx com pool keep-alive e novas tentativas com backoff exponencial"""
+
+    def __init__(self, max_retries: int = 3, backoff: float = 0.5, pool_size: int = 10,
+                 keepalive_expiry: float = 300.0):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._transport = httpx.HTTPTransport(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=keepalive_expiry
+            )
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self._transport.handle_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadError,
+                    httpx.RemoteProtocolError):
+                if last_attempt:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    return response
+                response.close()
+            time.sleep(self.backoff * (2 ** attempt))
+
+    def close(self):
+        self._transport.close()
+
+
+class OllamaSession:
+    """Sessão HTTP compartilhada com o Ollama.
+
+    Mantém um pool de conexões keep-alive usado tanto pelo `OllamaLLM` quanto
+    pelas chamadas diretas à API (aquecimento e verificação de saúde), aplica
+    timeouts por requisição e repete falhas transitórias com backoff. Os valores
+    padrão vêm das variáveis OLLAMA_KEEP_ALIVE, OLLAMA_TIMEOUT,
+    OLLAMA_MAX_RETRIES, OLLAMA_BACKOFF e OLLAMA_POOL_SIZE.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, model: Optional[str] = None,
+                 keep_alive: Optional[str] = None, timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None, backoff: Optional[float] = None,
+                 pool_size: Optional[int] = None):
+        self.base_url = (base_url or os.getenv("OLLAMA_BASE_URL") or "http://localhost:11434").rstrip("/")
+        self.model = model or os.getenv("OLLAMA_MODEL")
+        self.keep_alive = keep_alive or os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        self.timeout = timeout if timeout is not None else float(os.getenv("OLLAMA_TIMEOUT", "120"))
+
+        self.transport = RetryTransport(
+            max_retries=max_retries if max_retries is not None else int(os.getenv("OLLAMA_MAX_RETRIES", "3")),
+            backoff=backoff if backoff is not None else float(os.getenv("OLLAMA_BACKOFF", "0.5")),
+            pool_size=pool_size if pool_size is not None else int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+        )
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            transport=self.transport,
+            timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0))
+        )
+
+    def llm_kwargs(self) -> Dict[str, Any]:
+        """Argumentos para o `OllamaLLM` reutilizar o mesmo pool e timeouts"""
+        return {
+            "base_url": self.base_url,
+            "keep_alive": self.keep_alive,
+            "client_kwargs": {"timeout": self.timeout},
+            "sync_client_kwargs": {"transport": self.transport}
+        }
+
+    def ping(self) -> Dict[str, Any]:
+        """Verifica se o servidor responde e se o modelo está disponível, sem gerar texto"""
+        response = self.client.get("/api/tags")
+        response.raise_for_status()
+        models = [m.get("name") or m.get("model") for m in response.json().get("models", [])]
+        available = any(
+            name == self.model or name.split(":")[0] == self.model
+            for name in models if name
+        )
+        return {"models": models, "model_available": available}
+
+    def warm_up(self) -> float:
+        """Carrega o modelo na memória com uma requisição sem prompt.
+
+        Retorna o tempo gasto em segundos; `keep_alive` mantém o modelo
+        residente para que a primeira pergunta não pague o carregamento.
+        """
+        start = time.perf_counter()
+        response = self.client.post(
+            "/api/generate",
+            json={"model": self.model, "keep_alive": self.keep_alive, "stream": False}
+        )
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    def close(self):
+        self.client.close()
@@ -1,5 +1,7 @@
-from llm.chain import StarWarsQAChain
 import argparse
+import os
+import subprocess
+import sys
 
 def display_result(result):
     """Exibe os resultados formatados"""
@@ -11,21 +13,75 @@ def display_result(result):
         if "context" in result:
             print("\n📌 Contexto:", result["context"])
 
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Sistema de Q&A do Universo Star Wars",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        "--question",
+        type=str,
+        help="Pergunta sobre o universo Star Wars\nExemplo: 'Quem são os personagens do Episódio IV?'"
+    )
+    parser.add_argument(
+        "--profile-imports",
+        action="store_true",
+        help="Mede o tempo de importação das dependências (python -X importtime) e sai"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Quantidade de módulos exibidos no relatório de --profile-imports"
+    )
+    return parser
+
+def profile_imports(top=20):
+    """Relatório dos módulos mais lentos para importar, em um processo limpo"""
+    script = (
+        "import importlib, llm.chain as chain\n"
+        "chain.load_dependencies()\n"
+        "for module, _ in chain.CHAIN_CANDIDATES:\n"
+        "    try:\n"
+        "        importlib.import_module(module)\n"
+        "    except Exception:\n"
+        "        pass\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Módulos de nível superior têm um único espaço de recuo no relatório
+        top_level = not name.startswith("  ")
+        modules.append((int(cumulative_us), int(self_us), name.strip(), top_level))
+
+    total = sum(cumulative for cumulative, _, _, top_level in modules if top_level)
+    print(f"⏱️ Tempo total de importação: {total / 1000:.1f} ms ({len(modules)} módulos)\n")
+    print(f"{'acumulado (ms)':>15} {'próprio (ms)':>13}  módulo")
+    for cumulative, self_us, name, _ in sorted(modules, reverse=True)[:top]:
+        print(f"{cumulative / 1000:>15.1f} {self_us / 1000:>13.1f}  {name}")
+    if proc.returncode != 0:
+        print(f"\n⚠️ A importação terminou com erro:\n{proc.stderr.splitlines()[-1]}")
+
 def main():
+    args = build_parser().parse_args()
+
+    if args.profile_imports:
+        profile_imports(args.top)
+        return
+
     try:
+        from llm.chain import StarWarsQAChain
         qa_system = StarWarsQAChain()
-        
-        parser = argparse.ArgumentParser(
-            description="Sistema de Q&A do Universo Star Wars",
-            formatter_class=argparse.RawTextHelpFormatter
-        )
-        parser.add_argument(
-            "--question", 
-            type=str, 
-            help="Pergunta sobre o universo Star Wars\nExemplo: 'Quem são os personagens do Episódio IV?'"
-        )
-        args = parser.parse_args()
-        
+
         if args.question:
             result = qa_system.query(args.question)
             display_result(result)
@@ -38,13 +94,13 @@ def main():
                     break
                 if not question:
                     continue
-                    
+
                 result = qa_system.query(question)
                 display_result(result)
-                
+
     except Exception as e:
         print(f"\n⚠️ Erro crítico: {str(e)}")
         print("Verifique:\n1. Se o Neo4j está rodando\n2. Se o Ollama está disponível\n3. As configurações no arquivo .env")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,55 @@
+"""Verificações do modo de chamada única: leitura da saída do LLM e preenchimento do modelo.
+
+Uso: python tools/check_answer_template.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.answer_template import parse_single_call_output, render_answer_template
+
+
+def check_parse():
+    """Cypher e modelo separados, sem cercas de código, aspas ou texto extra do LLM"""
+    cypher = "MATCH (c:Character {name: 'Luke Skywalker'}) RETURN c.name AS name"
+
+    fenced = f"CYPHER: ```cypher\n{cypher}\n```\nRESPOSTA: ```\n{{name}}\n```"
+    assert parse_single_call_output(fenced) == (cypher, "{name}")
+
+    chatty = f"CYPHER: {cypher}\nRESPOSTA: \"{{name}} é um Jedi.\"\n\nEspero ter ajudado!"
+    assert parse_single_call_output(chatty) == (cypher, "{name} é um Jedi.")
+
+    # Aspas dentro da consulta não podem ser removidas
+    quoted = "CYPHER: MATCH (n) RETURN 'x'\nRESPOSTA: {x}"
+    assert parse_single_call_output(quoted) == ("MATCH (n) RETURN 'x'", "{x}")
+
+    assert parse_single_call_output(f"```{cypher}```") == (cypher, None)
+    print("✅ parse_single_call_output: Cypher e modelo extraídos")
+
+
+def check_render():
+    """Modelo preenchido só quando o formato do resultado cabe nele"""
+    row = {"name": "Luke Skywalker", "planet": "Tatooine", "height": 172.0, "films": ["A New Hope", "Return of the Jedi"]}
+    assert render_answer_template("{name} é do planeta {planet}.", [row]) == "Luke Skywalker é do planeta Tatooine."
+    assert render_answer_template("{name} mede {height} cm", [row]) == "Luke Skywalker mede 172 cm"
+    assert render_answer_template("{name}: {films}", [row]) == "Luke Skywalker: A New Hope, Return of the Jedi"
+    assert render_answer_template("{name} ({planet})", [row, {"name": "Leia", "planet": "Alderaan"}]) == \
+        "Luke Skywalker (Tatooine)\nLeia (Alderaan)"
+
+    # Casos que devem voltar para o LLM
+    assert render_answer_template("{name}", []) is None
+    assert render_answer_template(None, [row]) is None
+    assert render_answer_template("Sem marcadores", [row]) is None
+    assert render_answer_template("{name} {missing}", [row]) is None
+    assert render_answer_template("{name} {x}", [{"name": "Luke", "x": None}]) is None
+    assert render_answer_template("{name} {x}", [{"name": "Luke", "x": []}]) is None
+    assert render_answer_template("Resultado: {n}", [{"n": {"name": "x"}}]) is None
+    assert render_answer_template("{n}", [{"n": [{"name": "x"}]}]) is None
+    assert render_answer_template("{name} é do planeta {planet}.", [row, row]) is None
+    print("✅ render_answer_template: preenchimento e retorno ao LLM")
+
+
+if __name__ == "__main__":
+    check_parse()
+    check_render()
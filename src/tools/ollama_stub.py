@@ -0,0 +1,162 @@
+"""Servidor HTTP que imita a API do Ollama, usado para verificar o cliente e o batcher sem um modelo real.
+
+Uso: python tools/ollama_stub.py
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.server.record("GET", self.path, self.client_address[1], {})
+        if self.path == "/api/tags":
+            self._send(200, {"models": [{"name": f"{self.server.model}:latest"}]})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+        self.server.record("POST", self.path, self.client_address[1], body)
+
+        if self.server.take_failure():
+            return self._send(503, {"error": "server busy"})
+
+        prompt = body.get("prompt", "")
+        time.sleep(self.server.latency(prompt) if prompt else 0)
+        payload = {"model": body.get("model"), "response": f"echo:{prompt}" if prompt else "", "done": True}
+        if body.get("stream", True):
+            return self._send(200, (json.dumps(payload) + "\n").encode("utf-8"), "application/x-ndjson")
+        self._send(200, payload)
+
+
+class OllamaStubServer(ThreadingHTTPServer):
+    """Stub com falhas 503 programáveis e latência simulada por prompt"""
+
+    daemon_threads = True
+
+    def __init__(self, model="llama3", failures=0, latency=None):
+        super().__init__(("127.0.0.1", 0), OllamaStubHandler)
+        self.model = model
+        self.failures = failures
+        self.latency = latency or (lambda prompt: 0.0)
+        self.requests = []
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def record(self, method, path, port, body):
+        with self._lock:
+            self.requests.append({"method": method, "path": path, "port": port, "body": body})
+
+    def take_failure(self):
+        with self._lock:
+            if self.failures > 0:
+                self.failures -= 1
+                return True
+            return False
+
+
+def check_session():
+    """Pool keep-alive, aquecimento, /api/tags e novas tentativas após 503"""
+    from langchain_ollama import OllamaLLM
+    from llm.ollama_client import OllamaSession
+
+    server = OllamaStubServer(failures=2)
+    session = OllamaSession(base_url=server.url, model="llama3", keep_alive="15m", backoff=0.01)
+    try:
+        session.warm_up()
+        warm_up = [r for r in server.requests if r["path"] == "/api/generate"]
+        assert len(warm_up) == 3, "o aquecimento deveria repetir as duas respostas 503"
+        assert all(r["body"].get("keep_alive") == "15m" and "prompt" not in r["body"] for r in warm_up)
+
+        assert session.ping()["model_available"]
+
+        llm = OllamaLLM(model="llama3", **session.llm_kwargs())
+        assert llm.invoke("oi") == "echo:oi"
+        assert llm.invoke("tchau") == "echo:tchau"
+
+        ports = {r["port"] for r in server.requests[-3:]}
+        assert len(ports) == 1, "ping e gerações deveriam reutilizar a mesma conexão"
+        print("✅ OllamaSession: keep-alive, aquecimento, /api/tags e retry com backoff")
+    finally:
+        session.close()
+        server.shutdown()
+
+
+def check_batching():
+    """Despacho com latência simulada: slots reocupados na hora, respostas roteadas e cadeia pelo batcher"""
+    from concurrent.futures import ThreadPoolExecutor
+    from langchain_core.prompts import PromptTemplate
+    from langchain_ollama import OllamaLLM
+    from llm.batched_llm import BatchedLLM
+    from llm.batching import MicroBatcher
+    from llm.ollama_client import OllamaSession
+
+    server = OllamaStubServer(latency=lambda prompt: 1.0 if prompt == "lento" else 0.1)
+    session = OllamaSession(base_url=server.url, model="llama3")
+    batcher = MicroBatcher(OllamaLLM(model="llama3", **session.llm_kwargs()), max_batch_size=4)
+    try:
+        prompts = ["lento"] + [f"p{i}" for i in range(11)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(len(prompts)) as callers:
+            answers = list(callers.map(batcher.invoke, prompts))
+        elapsed = time.perf_counter() - start
+        assert answers == [f"echo:{prompt}" for prompt in prompts], "respostas trocadas entre chamadores"
+
+        metrics = batcher.metrics()
+        assert metrics["requests"] == len(prompts) and metrics["max_batch_size"] <= 4
+        # 12 prompts em 4 slots: 8 esperam, mas só até um slot rápido vagar (~0.1s por rodada);
+        # em lotes sincronizados o prompt lento seguraria os demais por ~1s na fila
+        assert metrics["max_queue_delay_ms"] < 600, metrics
+        print(f"✅ MicroBatcher: {len(prompts)} prompts em {elapsed:.2f}s, métricas {metrics}")
+
+        start = time.perf_counter()
+        for _ in range(5):
+            batcher.llm.invoke("direto")
+        direct = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(5):
+            batcher.invoke("sozinho")
+        overhead = (time.perf_counter() - start - direct) / 5
+        assert overhead < 0.005, f"chamada isolada não deveria esperar na fila ({overhead * 1000:.1f} ms)"
+        print(f"✅ MicroBatcher: chamada isolada despachada na hora (+{overhead * 1000:.1f} ms)")
+
+        # Caminho das cadeias do LangChain (GraphCypherQAChain usa prompt | llm)
+        before = batcher.metrics()["requests"]
+        chain = PromptTemplate.from_template("pergunta {n}") | BatchedLLM(batcher=batcher)
+        answers = chain.batch([{"n": i} for i in range(4)])
+        assert answers == [f"echo:pergunta {i}" for i in range(4)], answers
+        assert batcher.metrics()["requests"] == before + 4, "a cadeia deveria passar pelo batcher"
+        print("✅ BatchedLLM: chamadas da cadeia roteadas pelo MicroBatcher")
+    finally:
+        batcher.close()
+        session.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    check_session()
+    check_batching()